@@ -0,0 +1,347 @@
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import socket
+import struct
+
+import numpy as np
+import pandas as pd
+
+import schemas
+from result_cache import memoize
+
+# Local data service shared by the streamlit sessions.
+#
+# The service loads the datasets once and answers queries such as
+# "CPIAUCSL, PCE normalized over the last 48 months" or "MoM/YoY inflation of CPIAUCSL
+# since 2018-08". Identical requests that arrive
+# while one is being computed share the same computation. Results are sent back
+# column by column as raw numpy buffers instead of json.
+#
+#   python data_service.py                        # localhost:8765
+#   python data_service.py --socket /tmp/ds.sock  # unix socket
+#
+# Pages talk to it through DataClient; set DATA_SERVICE=unix:/path or host:port to
+# point them somewhere else, or DATA_SERVICE=off to always compute in-process.
+#
+# Wire format (all lengths are 4 byte big-endian):
+#   request:  length + json {"op": ..., ...}, at most MAX_REQUEST bytes
+#   response: length + json header {"status": "ok", "columns": [...], "dtypes": [...], "rows": n}
+#             then per column: length + raw little-endian buffer
+#             date columns are sent as int64 in their datetime64 unit, values as float64
+
+DEFAULT_ADDRESS = 'localhost:8765'
+
+# files served, loaded through the schema registry
+SERIES = ['CPIAUCSL', 'CPIFABSL', 'CPIHOSSL', 'CPIAPPSL', 'CPITRNSL', 'CPIMEDSL', 'CPIRECSL',
+          'CPIEDUSL', 'CPIOGSSL', 'PCE', 'PSAVERT', 'PSAV', 'REVOLSL', 'UNRATE', 'DFEDTARU', 'INTEREST']
+
+OPS = ('series', 'normalized', 'inflation')
+
+# requests are a few hundred bytes of json; anything bigger is a bad client
+MAX_REQUEST = 1024 * 1024
+
+_HEADER = struct.Struct('>I')
+
+class DataServiceError(Exception):
+    pass
+
+def load_series(name):
+    if name not in SERIES:
+        raise DataServiceError('unknown series {name}'.format(name=name))
+    return schemas.load(name)
+
+def normalize_col(df, col_name):
+    mean = df[col_name].mean()
+    std = df[col_name].std()
+    df[col_name] = (df[col_name] - mean) / std
+
+    return df
+
+@memoize
+def combine_series(df_list, months=None, start=None, end=None, normalize=False):
+    """
+    Outer merge series on DATE after keeping the last `months` rows of each and the
+    inclusive [start, end] DATE range, optionally normalizing each series over that window.
+    """
+    combined_df = None
+
+    for df in df_list:
+        df_copy = df.copy()
+        if months is not None:
+            df_copy = df_copy.tail(months)
+        if start is not None:
+            df_copy = df_copy[df_copy['DATE'] >= start]
+        if end is not None:
+            df_copy = df_copy[df_copy['DATE'] <= end]
+        if normalize:
+            df_copy = normalize_col(df_copy, df_copy.columns[1])
+
+        combined_df = df_copy if combined_df is None else combined_df.merge(df_copy, on='DATE', how='outer')
+
+    return combined_df.sort_values('DATE', ignore_index=True)
+
+@memoize
+def inflation_features(df, base='current'):
+    """
+    Lags and MoM / YoY inflation % of a series (DATE, value).
+
+    base='current' divides the change by the current value (inflation-intro.py's convention),
+    base='prior' by the value 1 / 12 months earlier (pages/analysis.py).
+    """
+    df = df[['DATE', df.columns[1]]].copy()
+    col = df.columns[1]
+    # Calculate 1 month and 12 month lags, for later inflation % calculations
+    df['lag_1_diff'] = df[col].diff()
+    df['lag_12_diff'] = df[col].diff(12)
+    # Calculate inflation as % increase MoM and YoY
+    if base == 'prior':
+        df['MoM Inflation %_{col}'.format(col=col)] = (df['lag_1_diff'] / (df[col] - df['lag_1_diff'])) * 100
+        df['YoY Inflation %_{col}'.format(col=col)] = (df['lag_12_diff'] / (df[col] - df['lag_12_diff'])) * 100
+    else:
+        df['MoM Inflation %_{col}'.format(col=col)] = (df['lag_1_diff'] / df[col]) * 100
+        df['YoY Inflation %_{col}'.format(col=col)] = (df['lag_12_diff'] / df[col]) * 100
+
+    return df
+
+def run_query(datasets, request):
+    op = request.get('op')
+    if op not in OPS:
+        raise DataServiceError('unknown op {op}'.format(op=op))
+
+    names = request.get('series') or []
+    if not isinstance(names, list) or not names:
+        raise DataServiceError('series must be a non-empty list')
+    for name in names:
+        if not isinstance(name, str) or name not in datasets:
+            raise DataServiceError('unknown series {name!r}'.format(name=name))
+
+    months = request.get('months')
+    if months is not None and (isinstance(months, bool) or not isinstance(months, int) or months < 1):
+        raise DataServiceError('months must be a positive integer, got {m!r}'.format(m=months))
+
+    for field in ('start', 'end'):
+        value = request.get(field)
+        if value is None:
+            continue
+        try:
+            datetime.date.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise DataServiceError('{f} must be a YYYY-MM-DD string, got {v!r}'.format(f=field, v=value))
+
+    if op == 'inflation':
+        if len(names) != 1:
+            raise DataServiceError('inflation takes exactly one series')
+        base = request.get('base', 'current')
+        if base not in ('current', 'prior'):
+            raise DataServiceError("base must be 'current' or 'prior', got {b!r}".format(b=base))
+        # lags use the full history, the window is applied afterwards
+        return combine_series([inflation_features(datasets[names[0]], base)],
+                              months=request.get('months'),
+                              start=request.get('start'),
+                              end=request.get('end'))
+
+    return combine_series([datasets[name] for name in names],
+                          months=request.get('months'),
+                          start=request.get('start'),
+                          end=request.get('end'),
+                          normalize=op == 'normalized')
+
+def _request_key(request):
+    return json.dumps(request, sort_keys=True)
+
+def encode_frame(df):
+    """
+    Split a result dataframe into the header and column buffers of the wire format.
+    """
+    columns = list(df.columns)
+    buffers = []
+    dtypes = []
+    for col in columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            values = df[col].to_numpy()
+            buffers.append(values.view('<i8').tobytes())
+            dtypes.append(values.dtype.str)
+        else:
+            buffers.append(df[col].to_numpy(dtype='<f8').tobytes())
+            dtypes.append('<f8')
+
+    header = {'status': 'ok', 'columns': columns, 'dtypes': dtypes, 'rows': len(df)}
+    return header, buffers
+
+def decode_frame(header, buffers):
+    data = {}
+    for col, dtype, buf in zip(header['columns'], header['dtypes'], buffers):
+        data[col] = np.frombuffer(buf, dtype=dtype)
+
+    return pd.DataFrame(data, columns=header['columns'])
+
+class DataService:
+    def __init__(self, series=SERIES):
+        self.datasets = {name: load_series(name) for name in series}
+        self._in_flight = {}
+        self.stats = {'requests': 0, 'computations': 0, 'coalesced': 0}
+
+    async def query(self, request):
+        """
+        Run a query in a worker thread, sharing the result with identical in-flight queries.
+        """
+        self.stats['requests'] += 1
+        key = _request_key(request)
+
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.stats['coalesced'] += 1
+            return await asyncio.shield(future)
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(None, run_query, self.datasets, request)
+        self._in_flight[key] = future
+        self.stats['computations'] += 1
+        try:
+            return await asyncio.shield(future)
+        finally:
+            self._in_flight.pop(key, None)
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    size = _HEADER.unpack(await reader.readexactly(_HEADER.size))[0]
+                    if size > MAX_REQUEST:
+                        # can't skip that much safely, answer and drop the connection
+                        await self._send(writer, {'status': 'error', 'message': 'request too large'}, [])
+                        break
+                    payload = await reader.readexactly(size)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    # client went away mid-request
+                    break
+
+                try:
+                    request = json.loads(payload)
+                    if not isinstance(request, dict):
+                        raise DataServiceError('request must be a json object')
+                    result = await self.query(request)
+                    header, buffers = encode_frame(result)
+                except DataServiceError as e:
+                    header, buffers = {'status': 'error', 'message': str(e)}, []
+                except Exception as e:
+                    # always answer with an error frame, so the client doesn't mistake it for a dropped service
+                    header, buffers = {'status': 'error', 'message': '{t}: {e}'.format(t=type(e).__name__, e=e)}, []
+
+                await self._send(writer, header, buffers)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _send(self, writer, header, buffers):
+        for payload in [json.dumps(header).encode()] + buffers:
+            writer.write(_HEADER.pack(len(payload)))
+            writer.write(payload)
+            await writer.drain()
+
+    async def serve(self, address=DEFAULT_ADDRESS):
+        kind, target = parse_address(address)
+        if kind == 'unix':
+            if os.path.exists(target):
+                os.remove(target)
+            server = await asyncio.start_unix_server(self.handle, path=target)
+        else:
+            server = await asyncio.start_server(self.handle, host=target[0], port=target[1])
+
+        async with server:
+            await server.serve_forever()
+
+def parse_address(address):
+    if address.startswith('unix:'):
+        return 'unix', address[len('unix:'):]
+    host, _, port = address.rpartition(':')
+    return 'tcp', (host or 'localhost', int(port))
+
+class DataClient:
+    """
+    Blocking client used by the pages. Falls back to computing in-process when no
+    service is reachable, so the app still runs without one.
+    """
+
+    def __init__(self, address=None, timeout=30):
+        self.address = address or os.environ.get('DATA_SERVICE', DEFAULT_ADDRESS)
+        self.timeout = timeout
+        self._local = None
+
+    def _connect(self):
+        kind, target = parse_address(self.address)
+        if kind == 'unix':
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(target)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def _read_frame(self, sock_file):
+        size = _HEADER.unpack(sock_file.read(_HEADER.size))[0]
+        payload = sock_file.read(size)
+        if len(payload) != size:
+            raise ConnectionError('data service closed the connection mid-frame')
+        return payload
+
+    def _remote(self, request):
+        sock = self._connect()
+        try:
+            payload = json.dumps(request).encode()
+            sock.sendall(_HEADER.pack(len(payload)) + payload)
+
+            with sock.makefile('rb') as sock_file:
+                header = json.loads(self._read_frame(sock_file))
+                if header['status'] != 'ok':
+                    raise DataServiceError(header['message'])
+                buffers = [self._read_frame(sock_file) for _ in header['columns']]
+        finally:
+            sock.close()
+
+        return decode_frame(header, buffers)
+
+    def query(self, request):
+        if self.address != 'off':
+            try:
+                return self._remote(request)
+            except (OSError, struct.error):
+                pass
+
+        if self._local is None:
+            self._local = {name: load_series(name) for name in SERIES}
+        return run_query(self._local, request)
+
+    def series(self, names, months=None, start=None, end=None):
+        return self.query({'op': 'series', 'series': list(names), 'months': months, 'start': start, 'end': end})
+
+    def normalized(self, names, months=None, start=None, end=None):
+        return self.query({'op': 'normalized', 'series': list(names), 'months': months, 'start': start, 'end': end})
+
+    def inflation(self, name, base='current', months=None, start=None, end=None):
+        return self.query({'op': 'inflation', 'series': [name], 'base': base,
+                           'months': months, 'start': start, 'end': end})
+
+# shared by the pages, so the in-process fallback loads the csvs once
+default_client = DataClient()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local data service for the streamlit pages')
+    parser.add_argument('--address', default=DEFAULT_ADDRESS, help='host:port to listen on')
+    parser.add_argument('--socket', help='unix socket path, overrides --address')
+    args = parser.parse_args()
+
+    address = 'unix:' + args.socket if args.socket else args.address
+    asyncio.run(DataService().serve(address))
@@ -0,0 +1,117 @@
+import pandas as pd
+
+# Streaming reader for the long-format datasets (HOMESALES.csv, SALES.csv, RESCONST.csv, CONSTRUCTION.csv).
+# Rows are read in chunks and filtered as they come in, so only the requested
+# dimensions / date range are ever held in memory, not the whole file.
+
+CHUNK_SIZE = 50000
+
+def _apply_filters(chunk, filters, start, end):
+    mask = pd.Series(True, index=chunk.index)
+
+    for col, value in filters.items():
+        if isinstance(value, (list, tuple, set)):
+            mask &= chunk[col].isin(value)
+        else:
+            mask &= chunk[col] == value
+
+    # DATE is ISO formatted (YYYY-MM-DD) so string comparison matches date order
+    if start is not None:
+        mask &= chunk['DATE'] >= start
+    if end is not None:
+        mask &= chunk['DATE'] <= end
+
+    return chunk[mask]
+
+def _output_columns(path, columns):
+    # DATE first, then the requested columns (all of the file's columns when None)
+    if columns is None:
+        columns = list(pd.read_csv(path, nrows=0, encoding='utf-8-sig').columns)
+    return ['DATE'] + [col for col in columns if col != 'DATE']
+
+def read_chunks(path, filters=None, columns=None, start=None, end=None, chunksize=CHUNK_SIZE, dtype=None):
+    """
+    Yield filtered chunks of a long-format csv. The index keeps the file's row numbers.
+
+    filters: dict of column -> value (or list of values) to keep, e.g. {'REGION': 'United States'}
+    columns: columns to return, DATE is always included and first
+    start / end: inclusive 'YYYY-MM-DD' bounds on DATE
+    dtype: passed to read_csv, e.g. str to get the raw text
+    """
+    filters = filters or {}
+
+    # column pushdown: only parse what is returned or filtered on
+    columns = _output_columns(path, columns)
+    usecols = columns + [col for col in filters if col not in columns]
+
+    # utf-8-sig strips the BOM on the DATE header of these files
+    reader = pd.read_csv(path, usecols=usecols, chunksize=chunksize, dtype=dtype, encoding='utf-8-sig')
+
+    for chunk in reader:
+        chunk = _apply_filters(chunk, filters, start, end)
+        if chunk.empty:
+            continue
+        yield chunk[columns]
+
+def read_filtered(path, filters=None, columns=None, start=None, end=None, chunksize=CHUNK_SIZE):
+    """
+    Same as read_chunks but returns one dataframe with only the matching rows.
+    """
+    chunks = list(read_chunks(path, filters, columns, start, end, chunksize))
+    if not chunks:
+        return pd.DataFrame(columns=_output_columns(path, columns))
+
+    return pd.concat(chunks, ignore_index=True)
+
+def read_groups(path, group_col, filters=None, columns=None, start=None, end=None, chunksize=CHUNK_SIZE):
+    """
+    Yield (group value, rows) pieces of a long-format csv split by group_col
+    (e.g. 'REGION', 'TYPE', 'SECTOR') as each chunk is read. A group can show up in
+    several pieces; nothing is kept between chunks.
+    """
+    if columns is not None and group_col not in columns:
+        columns = list(columns) + [group_col]
+
+    for chunk in read_chunks(path, filters, columns, start, end, chunksize):
+        for key, group_df in chunk.groupby(group_col, sort=False):
+            yield key, group_df
+
+def fold_groups(path, group_col, func, filters=None, columns=None, start=None, end=None, chunksize=CHUNK_SIZE):
+    """
+    Fold the pieces from read_groups into one value per group: state = func(state, rows),
+    with state None for a group's first piece. Memory is bounded by what func keeps.
+
+    e.g. the latest value per region:
+        fold_groups(path, 'REGION', lambda state, rows: rows.iloc[-1])
+    """
+    states = {}
+    for key, group_df in read_groups(path, group_col, filters, columns, start, end, chunksize):
+        states[key] = func(states.get(key), group_df)
+
+    return states
+
+def _keep_last_dates(df, months):
+    dates = sorted(df['DATE'].unique())[-months:]
+    return df[df['DATE'].isin(dates)]
+
+def tail_chunks(chunks, months):
+    """
+    Rows for the last n months of an iterable of chunks, regardless of how many groups
+    share a DATE. Only the current window is kept; None when there are no chunks.
+    """
+    tail_df = None
+    for chunk in chunks:
+        tail_df = chunk if tail_df is None else pd.concat([tail_df, chunk], ignore_index=True)
+        tail_df = _keep_last_dates(tail_df, months)
+
+    return tail_df
+
+def read_tail(path, months, filters=None, columns=None, chunksize=CHUNK_SIZE):
+    """
+    Matching rows for the last n months of a long-format csv (see tail_chunks).
+    """
+    tail_df = tail_chunks(read_chunks(path, filters, columns, chunksize=chunksize), months)
+    if tail_df is None:
+        return pd.DataFrame(columns=_output_columns(path, columns))
+
+    return tail_df.reset_index(drop=True)
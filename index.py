@@ -2,40 +2,14 @@ import streamlit as st
 import pandas as pd
 import altair as alt
 
-# consumer price index (https://fred.stlouisfed.org/series/CPIAUCSL)
-cpi_data = pd.read_csv('./data/CPIAUCSL.csv')
-# personal consumption expenditures (https://fred.stlouisfed.org/series/PCE)
-pce_data = pd.read_csv('./data/PCE.csv')
-# personal saving rate (https://fred.stlouisfed.org/series/PSAVERT)
-savings_data = pd.read_csv('./data/PSAVERT.csv')
-# revolving consumer credit (https://fred.stlouisfed.org/series/REVOLSL)
-credit_data = pd.read_csv('./data/REVOLSL.csv')
-# unemployment rate (https://fred.stlouisfed.org/series/UNRATE)
-unemployment_data = pd.read_csv('./data/UNRATE.csv')
-# interest rate (https://www.federalreserve.gov/monetarypolicy/openmarket.htm)
-interest_data = pd.read_csv('./data/INTEREST.csv')
-
-def normalize_col(df, col_name):
-    mean = df.mean().loc[col_name]  
-    std = df.std().loc[col_name]
-    df[col_name] = df[col_name].apply(lambda x: (x - mean) / std)
+from data_service import default_client
 
-    return df
-
-def get_combined_df(df_list, months):
-    combined_df = None
-    
-    for df in df_list:
-        start = df['DATE'].size - months
-        df = df[start:]
-        df = normalize_col(df, df.columns[1])
-        print(df.head())
-        
-        combined_df = df if combined_df is None else combined_df.merge(df, on='DATE', how='outer')
-        
-    return combined_df
+# interest rate (https://www.federalreserve.gov/monetarypolicy/openmarket.htm)
+interest_data = default_client.series(['INTEREST'])
 
-df_combined = get_combined_df([cpi_data, pce_data, savings_data, credit_data, unemployment_data], 60)
+# CPI, PCE, personal saving rate, revolving credit and unemployment (https://fred.stlouisfed.org),
+# normalized over the last 60 months by the data service
+df_combined = default_client.normalized(['CPIAUCSL', 'PCE', 'PSAVERT', 'REVOLSL', 'UNRATE'], months=60)
 df_combined = df_combined.rename(columns={'CPIAUCSL':'CPI', 'PSAVERT':'Savings', 'REVOLSL':'Revolving Credit', 'UNRATE':'Unemployment'})
 df_combined = df_combined.melt(id_vars=['DATE'],var_name='INDEX')
 
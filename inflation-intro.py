@@ -1,6 +1,9 @@
 import pandas as pd
 import altair as alt
 import streamlit as st
+
+import projection
+from data_service import default_client
 print("The pandas version we used is {v}".format(v = pd.__version__))
 print("The altair version we used is {v}".format(v = alt.__version__))
 
@@ -26,21 +29,13 @@ Using these sub-categories of inflation we're able to further analyze what parti
 
 
 
-# CPI All-Up
-
-cpi_all = pd.read_csv('./data/CPIAUCSL.csv')
+# CPI All-Up, served by data_service.py
 
+cpi_all = default_client.series(['CPIAUCSL'])
 
-# CPI By category
 
-cpi_foodbev = pd.read_csv('./data/CPIFABSL.csv')
-cpi_housing = pd.read_csv('./data/CPIHOSSL.csv')
-cpi_apparel = pd.read_csv('./data/CPIAPPSL.csv')
-cpi_transport = pd.read_csv('./data/CPITRNSL.csv')
-cpi_medical = pd.read_csv('./data/CPIMEDSL.csv')
-cpi_recreation = pd.read_csv('./data/CPIRECSL.csv')
-cpi_education = pd.read_csv('./data/CPIEDUSL.csv')
-cpi_other = pd.read_csv('./data/CPIOGSSL.csv')
+# CPI By category (CPIFABSL, CPIHOSSL, CPIAPPSL, CPITRNSL, CPIMEDSL, CPIRECSL, CPIEDUSL, CPIOGSSL)
+# are fetched with their MoM / YoY features below
 
 """
 Dataset of relevant events in US and World History
@@ -85,17 +80,15 @@ To accomplish this task we will do the following:
 """
 Generate the MoM and YoY % figures that are commonly-used by the government and industry
 """
-dfs = [cpi_all, cpi_foodbev, cpi_housing, cpi_apparel, cpi_transport, cpi_medical, cpi_recreation, cpi_education, cpi_other]
-
-for df in dfs:
-    # Get Col Name
-    col = df.columns[1]
-    # Calculate 1 month and 12 month lags, for later inflation % calculations
-    df['lag_1_diff'] = df[col].diff()
-    df['lag_12_diff'] = df[col].diff(12)
-    # Calculate inflation as % increase MoM and YoY
-    df['MoM Inflation %_{col}'.format(col=col)] = (df['lag_1_diff'] /df[col]) * 100
-    df['YoY Inflation %_{col}'.format(col=col)] = (df['lag_12_diff'] / df[col]) * 100
+cpi_all = default_client.inflation('CPIAUCSL')
+cpi_foodbev = default_client.inflation('CPIFABSL')
+cpi_housing = default_client.inflation('CPIHOSSL')
+cpi_apparel = default_client.inflation('CPIAPPSL')
+cpi_transport = default_client.inflation('CPITRNSL')
+cpi_medical = default_client.inflation('CPIMEDSL')
+cpi_recreation = default_client.inflation('CPIRECSL')
+cpi_education = default_client.inflation('CPIEDUSL')
+cpi_other = default_client.inflation('CPIOGSSL')
 
 
 
@@ -182,3 +175,44 @@ Now we can begin to see various different trends that contribute to the overall
 * Once lockdowns started loosening, quantitative easing began to take effect, and stimulus checks were received, we notice a dramatic spike in Transportation inflation. This is likely due to pent-up demand as well as energy cost fluctuations. We also notice that Food and Beverage inflation is steadily growing in the post-2020 period and remains the second highest overall YoY inflation component.
 * Although the trends are more muted, Housing and Apparel, and Medical inflation are growing and contributing to the overall upward trend in Inflation.
 """)
+
+st.markdown("""
+### What-If Projection
+Using the component breakdown we can project all-up inflation forward. Each simulated path resamples actual months from the last 10 years of component MoM changes, and the components are combined using their BLS weights in the CPI basket. Choose a component and an annual inflation rate for it to see how that scenario moves the range of outcomes.
+""")
+
+
+"""
+Project all-up YoY inflation under a user-chosen component scenario
+"""
+component_dfs = {'Food Bev': cpi_foodbev, 'Housing': cpi_housing, 'Apparel': cpi_apparel, 'Transport': cpi_transport,
+                 'Medical': cpi_medical, 'Recreation': cpi_recreation, 'Education': cpi_education, 'Other': cpi_other}
+history_dates, component_names, component_growth = projection.build_history(component_dfs, months=120)
+component_weights = projection.to_weights(component_names)
+
+scenario_component = st.selectbox('Component scenario', ['None'] + component_names)
+scenario = None
+if scenario_component != 'None':
+    scenario_rate = st.slider('{c} annual inflation %'.format(c=scenario_component), -10.0, 20.0, 2.0, 0.5)
+    scenario = {scenario_component: scenario_rate}
+projection_draws = st.select_slider('Simulated paths', [1000, 5000, 20000, 100000], value=5000)
+
+projection_horizon = 24
+projection_shift = projection.scenario_shift(component_names, component_growth, projection_horizon, scenario)
+projection_paths = projection.project(component_growth, component_weights, projection_horizon, projection_draws,
+                                      projection_shift, seed=593)
+fan_df = projection.fan_chart_df(projection_paths, cpi_all, history_dates[-1])
+
+outer_band = alt.Chart(fan_df).mark_area(opacity=0.2, color='blue').encode(
+    x = alt.X('DATE:T', axis = alt.Axis(title = 'Date', format = ("%b %Y"))),
+    y = alt.Y('q5:Q', title = 'YoY Inflation %'),
+    y2 = 'q95:Q'
+)
+inner_band = alt.Chart(fan_df).mark_area(opacity=0.3, color='blue').encode(x = 'DATE:T', y = 'q25:Q', y2 = 'q75:Q')
+median_line = alt.Chart(fan_df).mark_line(color='blue').encode(
+    x = 'DATE:T', y = 'q50:Q', tooltip = ['DATE:T', 'q5', 'q50', 'q95'])
+
+projection_chart = (outer_band + inner_band + median_line).properties(
+    width = 800, height = 400, title = 'Projected All Up Inflation (CPI), 5-95% Range')
+
+projection_chart + target_inflation_line
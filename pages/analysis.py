@@ -3,66 +3,31 @@ import streamlit as st
 import pandas as pd
 import altair as alt
 
-st.markdown("# Analysis")
+from data_service import default_client
 
-# Import datasets
+st.markdown("# Analysis")
 
-# CPI: consumer price index (https://fred.stlouisfed.org/series/CPIAUCSL)
-cpi_data = pd.read_csv('./data/CPIAUCSL.csv')
+# Import datasets, served by data_service.py
 
-# PCE: personal consumption expenditures (https://fred.stlouisfed.org/series/PCE)
-pce_data = pd.read_csv('./data/PCE.csv')
+# CPI: consumer price index (https://fred.stlouisfed.org/series/CPIAUCSL), used for inflation below
 
 # SAVINGS: personal saving rate (https://fred.stlouisfed.org/series/PSAVERT)
-savings_data = pd.read_csv('./data/PSAVERT.csv')
+savings_data = default_client.series(['PSAVERT'])
 
 # SAVINGS $: personal saving (https://apps.bea.gov/iTable/iTable.cfm?reqid=19&step=2#reqid=19&step=2&isuri=1&1921=survey)
-savings_dollars_data = pd.read_csv('./data/PSAV.csv')
+savings_dollars_data = default_client.series(['PSAV'])
 
 # REV CREDIT: revolving consumer credit (https://fred.stlouisfed.org/series/REVOLSL)
-credit_data = pd.read_csv('./data/REVOLSL.csv')
+credit_data = default_client.series(['REVOLSL'])
 
 # FED FUND RATE: interest rate (https://fred.stlouisfed.org/series/DFEDTARU)
-interest_data = pd.read_csv('./data/DFEDTARU.csv')
-
-def normalize_col(df, col_name):
-    mean = df.mean().loc[col_name]  
-    std = df.std().loc[col_name]
-    df[col_name] = df[col_name].apply(lambda x: (x - mean) / std)
-
-    return df
-
-def get_combined_df(df_list, months):
-    combined_df = None
-    
-    for df in df_list:
-        start = df['DATE'].size - months
-        df_copy = df[start:].copy()
-        print(df_copy.tail(2))
-        
-        combined_df = df_copy if combined_df is None else combined_df.merge(df_copy, on='DATE', how='outer')
-        
-    return combined_df
-
-def get_combined_df_norm(df_list_norm, months):
-    combined_df_norm = None
-    
-    for df in df_list_norm:
-        start = df['DATE'].size - months
-        df_copy = df[start:].copy()
-        df_copy = normalize_col(df_copy, df_copy.columns[1])
-        print(df_copy.tail(2))
-        
-        combined_df_norm = df_copy if combined_df_norm is None else combined_df_norm.merge(df_copy, on='DATE', how='outer')
-        
-    return combined_df_norm
+interest_data = default_client.series(['DFEDTARU'])
 
 st.markdown('### Consumer Price Index & Personal Consumption Expenditure')
 
 # CPI vs PCE dataframe
-df_CPI_PCE = get_combined_df_norm([cpi_data, pce_data], 48)
+df_CPI_PCE = default_client.normalized(['CPIAUCSL', 'PCE'], months=48)
 df_CPI_PCE = df_CPI_PCE.rename(columns={'CPIAUCSL':'CPI'})
-df_CPI_PCE['DATE'] = pd.to_datetime(df_CPI_PCE['DATE'])
 df_CPI_PCE = df_CPI_PCE[df_CPI_PCE['DATE'] >= '2020-08-01']
 
 # CPI vs PCE Correlation
@@ -102,19 +67,10 @@ st.markdown("""
 Causes of Inflation: https://news.stanford.edu/2022/09/06/what-causes-inflation/
 """)
 
-# Inflation dataframe
-df_INFL = cpi_data
-df_INFL = df_INFL.rename(columns={'CPIAUCSL':'CPI'})
-df_INFL['DATE'] = pd.to_datetime(df_INFL['DATE'])
-df_INFL = df_INFL[df_INFL['DATE'] >= '2017-08-01']
-
-# Calculate 12 month lag for later inflation % calculations
-df_INFL['lag_12_diff'] = df_INFL['CPI'].diff(periods=12)
-df_INFL['lag_12'] = df_INFL['CPI'] - df_INFL['lag_12_diff']
-
-# Calculate inflation as % increase YoY
-df_INFL['YoY_inflation_perc'] = (df_INFL['lag_12_diff'] / df_INFL['lag_12']) * 100
-df_INFL = df_INFL[df_INFL['DATE'] >= '2018-08-01']
+# Inflation dataframe: YoY % increase over the value 12 months earlier
+df_INFL = default_client.inflation('CPIAUCSL', base='prior', start='2018-08-01')
+df_INFL = df_INFL.rename(columns={'CPIAUCSL':'CPI', 'YoY Inflation %_CPIAUCSL':'YoY_inflation_perc'})
+df_INFL = df_INFL[['DATE', 'CPI', 'lag_12_diff', 'YoY_inflation_perc']]
 st.dataframe(df_INFL)
 
 # Inflation graph
@@ -129,7 +85,6 @@ inflation_text = inflation_line.mark_text(align='center',fontSize=11,dy=-10).enc
 
 # Fed Fund Rate
 df_INT = interest_data
-df_INT['DATE'] = pd.to_datetime(df_INT['DATE'])
 df_INT.reset_index(drop=True, inplace=True)
 df_INT = df_INT[df_INT['DATE'] >= '2018-08-01']
 df_INT = df_INT[df_INT['DATE'] <= '2022-08-01']
@@ -239,14 +194,10 @@ st.markdown('### Personal Savings Rate')
 # Personal Savings dataframe
 df_SAV = savings_data
 df_SAV = df_SAV.rename(columns={'PSAVERT':'Savings'})
-df_SAV['DATE'] = pd.to_datetime(df_SAV['DATE'])
 df_SAV = df_SAV[df_SAV['DATE'] >= '2018-08-01']
 
 # Personal Savings & Income dollar dataframe
 df_SAV_DOL = savings_dollars_data
-df_SAV_DOL['DATE'] = pd.to_datetime(savings_dollars_data['DATE'])
-df_SAV_DOL['PSAV'] = df_SAV_DOL['PSAV'].astype(float)
-df_SAV_DOL['PINC'] = df_SAV_DOL['PINC'].astype(float)
 df_SAV_DOL = df_SAV_DOL.rename(columns={'PINC':'Personal Income (Billions)'})
 df_SAV_DOL = df_SAV_DOL[df_SAV_DOL['DATE'] >= '2018-08-01']
 
@@ -378,7 +329,6 @@ st.markdown('### Revolving Credit')
 # Revolving Credit
 df_REV = credit_data
 df_REV = df_REV.rename(columns={'REVOLSL':'RevCredit'})
-df_REV['DATE'] = pd.to_datetime(df_REV['DATE'])
 df_REV = df_REV[df_REV['DATE'] >= '2018-08-01']
 
 # Revolving Credit line
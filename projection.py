@@ -0,0 +1,155 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Monte Carlo projection of all-items CPI from its components.
+#
+# Historical month-over-month growth of each component is kept as a (months x components)
+# array. Each draw resamples whole historical months (keeping the co-movement between
+# components), optionally shifted to a user chosen component path, and all draws and horizons
+# are evaluated at once:
+#
+#   component levels  (draws x horizon x components) = cumprod(1 + growth)
+#   all-items level   (draws x horizon)              = levels @ weights
+#
+# Large draw counts run in blocks so the (draws x horizon x components) array stays bounded,
+# in-process by default or sharded over a process pool when the caller asks for workers.
+
+COMPONENTS = {
+    'Food Bev': 'CPIFABSL',
+    'Housing': 'CPIHOSSL',
+    'Apparel': 'CPIAPPSL',
+    'Transport': 'CPITRNSL',
+    'Medical': 'CPIMEDSL',
+    'Recreation': 'CPIRECSL',
+    'Education': 'CPIEDUSL',
+    'Other': 'CPIOGSSL',
+}
+
+# BLS relative importance of the CPI-U major groups, December 2021
+WEIGHTS = {
+    'Food Bev': 15.157,
+    'Housing': 42.385,
+    'Apparel': 2.508,
+    'Transport': 16.553,
+    'Medical': 8.517,
+    'Recreation': 5.148,
+    'Education': 6.418,
+    'Other': 3.314,
+}
+
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+# draws evaluated at once; a block of 50000 x 24 months x 8 components is ~75MB
+BLOCK_DRAWS = 50000
+
+def build_history(component_dfs, months=120):
+    """
+    Align the component series on DATE and return (dates, names, growth) where growth is the
+    (months x components) array of month-over-month growth rates for the trailing window.
+    """
+    names = list(component_dfs)
+    levels = None
+    for name in names:
+        df = component_dfs[name]
+        df = df[['DATE', df.columns[1]]].rename(columns={df.columns[1]: name})
+        levels = df if levels is None else levels.merge(df, on='DATE')
+
+    levels = levels.sort_values('DATE').tail(months + 1)
+    growth = levels[names].to_numpy(dtype=float)
+    growth = growth[1:] / growth[:-1] - 1
+
+    return levels['DATE'].to_numpy()[1:], names, growth
+
+def to_weights(names, weights=WEIGHTS):
+    w = np.array([weights[name] for name in names], dtype=float)
+    return w / w.sum()
+
+def scenario_shift(names, growth, horizon, scenario=None):
+    """
+    (horizon x components) array added to every draw. A scenario maps a component name to an
+    annualized % rate, either one number or one per horizon month; drawn growth for that
+    component is re-centered on it, keeping its historical month to month volatility.
+    """
+    shift = np.zeros((horizon, len(names)))
+    if not scenario:
+        return shift
+
+    hist_mean = growth.mean(axis=0)
+    for name, rate in scenario.items():
+        col = names.index(name)
+        annual = np.broadcast_to(np.asarray(rate, dtype=float), (horizon,))
+        monthly = (1 + annual / 100) ** (1 / 12) - 1
+        shift[:, col] = monthly - hist_mean[col]
+
+    return shift
+
+def simulate_paths(growth, weights, shift, draws, seed=None):
+    """
+    All-items CPI level relative to the last observed month, as a (draws x horizon) array.
+    """
+    rng = np.random.default_rng(seed)
+    horizon = shift.shape[0]
+
+    # bootstrap whole historical months: (draws x horizon x components)
+    picks = rng.integers(0, growth.shape[0], size=(draws, horizon))
+    sampled = growth[picks] + shift
+
+    levels = np.cumprod(1 + sampled, axis=1)
+    return levels @ weights
+
+def _simulate_shard(args):
+    return simulate_paths(*args)
+
+def project(growth, weights, horizon=24, draws=5000, shift=None, seed=None, workers=None):
+    """
+    Simulated (draws x horizon) all-items paths, evaluated BLOCK_DRAWS at a time.
+
+    With workers=None (the default, used by the pages) the blocks run in-process, so a
+    streamlit rerun never forks the server. Pass workers=n to spread the blocks over a
+    pool of n processes for very large draw counts on multi-core machines.
+    """
+    if shift is None:
+        shift = np.zeros((horizon, growth.shape[1]))
+
+    blocks = -(-draws // BLOCK_DRAWS)
+    if blocks <= 1:
+        return simulate_paths(growth, weights, shift, draws, seed)
+
+    sizes = [draws // blocks + (1 if i < draws % blocks else 0) for i in range(blocks)]
+    seeds = np.random.SeedSequence(seed).spawn(blocks)
+    shards = [(growth, weights, shift, n, s) for n, s in zip(sizes, seeds)]
+
+    if workers is None or workers <= 1:
+        return np.concatenate([_simulate_shard(shard) for shard in shards])
+
+    with ProcessPoolExecutor(max_workers=min(workers, blocks)) as pool:
+        return np.concatenate(list(pool.map(_simulate_shard, shards)))
+
+def fan_chart_df(paths, cpi_all, last_date, quantiles=QUANTILES):
+    """
+    Projected YoY inflation % per future month, one column per quantile.
+
+    cpi_all is the all-items CPI dataframe (DATE, CPIAUCSL) and last_date the last month of
+    component history the paths start from (build_history's dates[-1]); the 12 months of
+    cpi_all up to last_date anchor the YoY calculation for the first projected year.
+    """
+    last_date = pd.to_datetime(last_date)
+    cpi_all = cpi_all[pd.to_datetime(cpi_all['DATE']) <= last_date]
+    if cpi_all.empty or pd.to_datetime(cpi_all['DATE'].iloc[-1]) != last_date:
+        raise ValueError('all-items CPI has no value for {d:%Y-%m-%d}'.format(d=last_date))
+
+    history = cpi_all.iloc[:, 1].to_numpy(dtype=float)[-12:]
+    horizon = paths.shape[1]
+
+    # levels: (draws x (12 + horizon)), history scaled so the last observed month is 1.0
+    levels = np.concatenate([np.broadcast_to(history / history[-1], (paths.shape[0], 12)), paths], axis=1)
+    yoy = (levels[:, 12:] / levels[:, :horizon] - 1) * 100
+
+    bands = np.quantile(yoy, quantiles, axis=0)
+    dates = pd.date_range(last_date, periods=horizon + 1, freq='MS')[1:]
+
+    fan_df = pd.DataFrame(bands.T, columns=['q{q:g}'.format(q=q * 100) for q in quantiles])
+    fan_df.insert(0, 'DATE', dates)
+    return fan_df
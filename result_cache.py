@@ -0,0 +1,290 @@
+import datetime
+import functools
+import hashlib
+import os
+import pickle
+import threading
+import types
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Two tier cache for the derived dataframes in index.py, inflation-intro.py and pages/analysis.py.
+# Results live in a memory LRU bounded by bytes; entries evicted from memory are spilled
+# to disk (also bounded by bytes) and promoted back to memory on their next hit.
+# Keys are content hashes of the input data and parameters, plus a version of the code: the
+# function's bytecode, the source of the file defining it and of any modules passed as
+# `depends`. Helpers in other modules that are not listed in `depends` are not tracked, so
+# list them (or bump `version=`) when a memoized function relies on them.
+
+MEMORY_LIMIT = 256 * 1024 * 1024
+DISK_LIMIT = 2 * 1024 * 1024 * 1024
+DISK_DIR = './.cache/results'
+
+def _hash_value(h, value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        h.update(type(value).__name__.encode())
+        if isinstance(value, pd.DataFrame):
+            h.update(repr(list(value.columns)).encode())
+            h.update(repr(list(value.dtypes.astype(str))).encode())
+        else:
+            h.update(repr((value.name, str(value.dtype))).encode())
+        h.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+    elif isinstance(value, (list, tuple)):
+        h.update('{t}:{n}'.format(t=type(value).__name__, n=len(value)).encode())
+        for item in value:
+            _hash_value(h, item)
+    elif isinstance(value, dict):
+        h.update('dict:{n}'.format(n=len(value)).encode())
+        for k in sorted(value, key=repr):
+            _hash_value(h, k)
+            _hash_value(h, value[k])
+    elif isinstance(value, np.ndarray):
+        if value.dtype.hasobject:
+            raise TypeError('cannot content-hash object arrays')
+        h.update('ndarray:{d}:{s}'.format(d=value.dtype.str, s=value.shape).encode())
+        h.update(np.ascontiguousarray(value).tobytes())
+    elif value is None or isinstance(value, (str, bytes, bool, int, float, np.generic, datetime.date)):
+        # exact reprs; datetime.date covers datetime and pd.Timestamp
+        h.update('{t}:{v!r}'.format(t=type(value).__name__, v=value).encode())
+    else:
+        raise TypeError('cannot content-hash {t} for a cache key'.format(t=type(value).__name__))
+
+def make_key(name, *args, **kwargs):
+    """
+    Content hash of a computation name plus its inputs.
+    """
+    h = hashlib.sha256(name.encode())
+    _hash_value(h, args)
+    _hash_value(h, kwargs)
+    return h.hexdigest()
+
+def _code_fingerprint(h, code):
+    # bytecode, referenced names and constants, recursing into nested functions/lambdas
+    # (their repr carries a memory address, so it can't be hashed directly)
+    h.update(code.co_code)
+    h.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            _code_fingerprint(h, const)
+        else:
+            h.update(repr(const).encode())
+
+def _source_fingerprint(h, path):
+    try:
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    except OSError:
+        # no source on disk (interactive definitions), the bytecode is all there is
+        h.update(b'<no source>')
+
+def code_version(func, depends=(), version=None):
+    """
+    Hash of func's bytecode, its defining file and the files of the `depends` modules, so
+    editing the function or helpers in those files invalidates its disk entries.
+    """
+    h = hashlib.sha256()
+    _code_fingerprint(h, func.__code__)
+    _source_fingerprint(h, func.__code__.co_filename)
+    for module in depends:
+        _source_fingerprint(h, module.__file__)
+    h.update(repr(version).encode())
+    return h.hexdigest()[:16]
+
+def _size_of(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+def _copy(value):
+    # callers go on to mutate the returned dataframes (rename, to_datetime, ...),
+    # so never hand out the cached object itself
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy()
+    return value
+
+class ResultCache:
+    def __init__(self, memory_limit=MEMORY_LIMIT, disk_limit=DISK_LIMIT, disk_dir=DISK_DIR):
+        self.memory_limit = memory_limit
+        self.disk_limit = disk_limit
+        self.disk_dir = disk_dir
+
+        self._memory = OrderedDict()   # key -> (value, size)
+        self._memory_bytes = 0
+        self._disk = OrderedDict()     # key -> size, oldest first
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0,
+                      'evictions': 0, 'spills': 0, 'disk_evictions': 0}
+
+        if self.disk_dir is not None and os.path.isdir(self.disk_dir):
+            self._load_disk_index()
+
+    def _load_disk_index(self):
+        files = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith('.pkl'):
+                stat = os.stat(os.path.join(self.disk_dir, name))
+                files.append((stat.st_mtime, name[:-4], stat.st_size))
+
+        for _, key, size in sorted(files):
+            self._disk[key] = size
+            self._disk_bytes += size
+
+        # the limit may have shrunk since these were written
+        self._trim_disk()
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key + '.pkl')
+
+    def _spill(self, key, value):
+        if self.disk_dir is None:
+            return
+
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.disk_limit:
+            return
+
+        os.makedirs(self.disk_dir, exist_ok=True)
+        tmp_path = self._disk_path(key) + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, self._disk_path(key))
+
+        if key in self._disk:
+            self._disk_bytes -= self._disk.pop(key)
+        self._disk[key] = len(data)
+        self._disk_bytes += len(data)
+        self.stats['spills'] += 1
+
+        self._trim_disk()
+
+    def _remove_disk(self, key):
+        self._disk_bytes -= self._disk.pop(key)
+        try:
+            os.remove(self._disk_path(key))
+        except FileNotFoundError:
+            pass
+
+    def _trim_disk(self):
+        while self._disk_bytes > self.disk_limit:
+            self._remove_disk(next(iter(self._disk)))
+            self.stats['disk_evictions'] += 1
+
+    def _put_memory(self, key, value, size):
+        if key in self._memory:
+            self._memory_bytes -= self._memory.pop(key)[1]
+
+        if size > self.memory_limit:
+            self._spill(key, value)
+            return
+
+        self._memory[key] = (value, size)
+        self._memory_bytes += size
+
+        while self._memory_bytes > self.memory_limit:
+            old_key, (old_value, old_size) = self._memory.popitem(last=False)
+            self._memory_bytes -= old_size
+            self.stats['evictions'] += 1
+            if old_key not in self._disk:
+                self._spill(old_key, old_value)
+
+    def _load_disk(self, key):
+        try:
+            with open(self._disk_path(key), 'rb') as f:
+                return pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            # unreadable entry: drop it from the index and the disk
+            self._remove_disk(key)
+            raise KeyError(key)
+
+    def get(self, key):
+        """
+        Return a copy of the cached value for key, raising KeyError on a miss.
+        """
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.stats['hits'] += 1
+                return _copy(self._memory[key][0])
+
+            if key in self._disk:
+                try:
+                    value = self._load_disk(key)
+                except KeyError:
+                    self.stats['misses'] += 1
+                    raise
+                self._disk.move_to_end(key)
+                self.stats['disk_hits'] += 1
+                self._put_memory(key, value, _size_of(value))
+                return _copy(value)
+
+            self.stats['misses'] += 1
+            raise KeyError(key)
+
+    def put(self, key, value):
+        with self._lock:
+            self._put_memory(key, _copy(value), _size_of(value))
+
+    def get_or_compute(self, key, compute):
+        try:
+            return self.get(key)
+        except KeyError:
+            pass
+
+        value = compute()
+        self.put(key, value)
+        return _copy(value)
+
+    def clear(self, disk=False):
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            if disk:
+                for key in list(self._disk):
+                    self._remove_disk(key)
+
+    def info(self):
+        """
+        Counters plus current tier sizes, for inspecting the cache from a page or notebook.
+        """
+        with self._lock:
+            return dict(self.stats,
+                        memory_entries=len(self._memory), memory_bytes=self._memory_bytes,
+                        disk_entries=len(self._disk), disk_bytes=self._disk_bytes)
+
+    def memoize(self, func=None, *, depends=(), version=None):
+        """
+        Decorator caching func's result under a content hash of its arguments and code.
+
+        depends: modules whose source the function relies on (e.g. helpers it calls there)
+        version: anything else that should invalidate the cached results when it changes
+
+            @memoize
+            def f(df): ...
+
+            @memoize(depends=[data_stream])
+            def g(df): ...
+        """
+        if func is None:
+            return functools.partial(self.memoize, depends=depends, version=version)
+
+        # streamlit runs every page as __main__, so the file disambiguates same-named functions
+        name = '{p}:{f}:{v}'.format(p=os.path.basename(func.__code__.co_filename), f=func.__qualname__,
+                                     v=code_version(func, depends, version))
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = make_key(name, *args, **kwargs)
+            return self.get_or_compute(key, lambda: func(*args, **kwargs))
+
+        wrapper.cache = self
+        return wrapper
+
+# shared by all pages; module imports persist across streamlit reruns and sessions
+default_cache = ResultCache()
+memoize = default_cache.memoize
@@ -0,0 +1,229 @@
+import os
+from collections import namedtuple
+
+import pandas as pd
+
+import data_stream
+from result_cache import memoize
+
+# Schema registry for the csvs in ./data.
+#
+# Each file is described once (columns and dtypes, DATE format, frequency, key columns).
+# Every entry point streams the file through data_stream.read_chunks, parses each chunk with
+# that description and runs the checks below on whole columns (carrying each group's last
+# DATE from one chunk to the next):
+#   load()      the whole file as one typed dataframe, for the small FRED series
+#   stream()    validated chunks, for the long-format files (HOMESALES, SALES, ...)
+#   load_tail() the last n months of a long-format file, holding only that window
+# Checks:
+#   - BOM stripped from the header, DATE parsed with the file's format
+#   - numeric columns coerced to float, failures reported
+#   - no duplicate keys, dates increasing within each key group
+#   - no missing periods for the file's frequency
+
+Schema = namedtuple('Schema', ['path', 'columns', 'date_format', 'freq', 'dims'])
+
+class SchemaError(ValueError):
+    pass
+
+def _fred(series, freq='MS'):
+    return Schema('./data/{s}.csv'.format(s=series), {'DATE': 'date', series: 'float'}, '%Y-%m-%d', freq, [])
+
+SCHEMAS = {
+    'CPIAUCSL': _fred('CPIAUCSL'),
+    'CPIFABSL': _fred('CPIFABSL'),
+    'CPIHOSSL': _fred('CPIHOSSL'),
+    'CPIAPPSL': _fred('CPIAPPSL'),
+    'CPITRNSL': _fred('CPITRNSL'),
+    'CPIMEDSL': _fred('CPIMEDSL'),
+    'CPIRECSL': _fred('CPIRECSL'),
+    'CPIEDUSL': _fred('CPIEDUSL'),
+    'CPIOGSSL': _fred('CPIOGSSL'),
+    'PCE': _fred('PCE'),
+    'PSAVERT': _fred('PSAVERT'),
+    'REVOLSL': _fred('REVOLSL'),
+    'UNRATE': _fred('UNRATE'),
+    'DFEDTARU': _fred('DFEDTARU', freq='D'),
+    'PSAV': Schema('./data/PSAV.csv', {'DATE': 'date', 'PSAV': 'float', 'PINC': 'float'}, '%m/%d/%y', 'MS', []),
+    # FOMC meeting dates, no regular frequency
+    'INTEREST': Schema('./data/INTEREST.csv', {'DATE': 'date', 'INTEREST': 'float', 'DAY': 'date'}, '%Y-%m-%d', None, []),
+    'HOMESALES': Schema('./data/HOMESALES.csv', {'DATE': 'date', 'TYPE': 'str', 'REGION': 'str', 'COUNT': 'float'},
+                        '%Y-%m-%d', 'MS', ['TYPE', 'REGION']),
+    'SALES': Schema('./data/SALES.csv', {'DATE': 'date', 'SECTOR': 'str', 'SALES (SEASONAL ADJ)': 'float'},
+                    '%Y-%m-%d', 'MS', ['SECTOR']),
+    'RESCONST': Schema('./data/RESCONST.csv', {'DATE': 'date', 'REGION': 'str', 'HOUSING STARTS': 'float'},
+                       '%Y-%m-%d', 'MS', ['REGION']),
+    'CONSTRUCTION': Schema('./data/CONSTRUCTION.csv', {'DATE': 'date', 'TYPE': 'str', 'CONSTRUCTION SPEND': 'float'},
+                           '%Y-%m-%d', 'MS', ['TYPE']),
+}
+
+def parse(raw_df, schema):
+    """
+    Cast the raw string columns of a csv to the schema's types.
+    Returns (df, problems) where problems lists values that could not be converted.
+    """
+    problems = []
+
+    missing = [col for col in schema.columns if col not in raw_df.columns]
+    if missing:
+        raise SchemaError('{p}: missing columns {m}'.format(p=schema.path, m=missing))
+
+    df = pd.DataFrame(index=raw_df.index)
+    for col, dtype in schema.columns.items():
+        values = raw_df[col].str.strip()
+        if dtype == 'date':
+            fmt = schema.date_format if col == 'DATE' else '%Y-%m-%d'
+            df[col] = pd.to_datetime(values, format=fmt, errors='coerce')
+        elif dtype == 'float':
+            df[col] = pd.to_numeric(values.str.replace(',', '', regex=False), errors='coerce').astype(float)
+        else:
+            df[col] = values
+
+        bad = df[col].isna() & values.notna() & (values != '') & (values != '.')
+        if bad.any():
+            problems.append('{c}: {n} unparseable values, first at row {r} ({v!r})'.format(
+                c=col, n=int(bad.sum()), r=int(bad.idxmax()), v=values[bad.idxmax()]))
+
+    return df, problems
+
+def _group_by(df, schema):
+    # one key per row; with no dims the whole file is one group
+    if schema.dims:
+        return [df[dim] for dim in schema.dims]
+    return [pd.Series(0, index=df.index)]
+
+def _group_index(by, rows):
+    if len(by) > 1:
+        return pd.MultiIndex.from_arrays([key.loc[rows] for key in by])
+    return pd.Index(by[0].loc[rows])
+
+def check(df, schema, last_dates=None):
+    """
+    Vectorized integrity checks on a parsed chunk. last_dates is the last DATE of each group
+    in the earlier chunks (None for the first), so ordering and gaps are checked across chunks.
+
+    Returns (problems, last_dates) with last_dates updated for the next chunk.
+    """
+    problems = []
+
+    if df['DATE'].isna().any():
+        problems.append('DATE: {n} missing dates'.format(n=int(df['DATE'].isna().sum())))
+
+    # prev: latest DATE seen so far in the row's group, including earlier chunks
+    by = _group_by(df, schema)
+    running = df['DATE'].groupby(by, sort=False).cummax()
+    prev = running.groupby(by, sort=False).shift()
+    if last_dates is not None:
+        carried = pd.Series(last_dates.reindex(_group_index(by, df.index)).to_numpy(), index=df.index)
+        prev = pd.concat([prev, carried], axis=1).max(axis=1)
+
+    # rows are in date order within each group, so a repeated key shows up as a repeated date
+    dup = df['DATE'] == prev
+    if dup.any():
+        problems.append('{n} duplicate {k} rows, first at row {r}'.format(
+            n=int(dup.sum()), k='/'.join(['DATE'] + schema.dims), r=int(dup.idxmax())))
+
+    backwards = df['DATE'] < prev
+    if backwards.any():
+        problems.append('DATE: not increasing at {n} rows, first at row {r}'.format(
+            n=int(backwards.sum()), r=int(backwards.idxmax())))
+
+    if schema.freq == 'MS':
+        if (df['DATE'].dt.day != 1).any():
+            problems.append('DATE: monthly dates not on the first of the month')
+        month = df['DATE'].dt.year * 12 + df['DATE'].dt.month
+        gap = (month - (prev.dt.year * 12 + prev.dt.month)) > 1
+    elif schema.freq == 'D':
+        gap = (df['DATE'] - prev) > pd.Timedelta(days=1)
+    else:
+        gap = pd.Series(False, index=df.index)
+
+    if gap.any():
+        first = gap.idxmax()
+        problems.append('DATE: {n} gaps in {f} series, first after {d:%Y-%m-%d}'.format(
+            n=int(gap.sum()), f=schema.freq, d=prev[first]))
+
+    chunk_last = running.groupby(by, sort=False).last()
+    if last_dates is not None:
+        chunk_last = pd.concat([chunk_last, last_dates], axis=1).max(axis=1)
+
+    return problems, chunk_last
+
+def _validated_chunks(schema, filters=None):
+    header = pd.read_csv(schema.path, nrows=0, encoding='utf-8-sig').columns
+    missing = [col for col in schema.columns if col not in header]
+    if missing:
+        raise SchemaError('{p}: missing columns {m}'.format(p=schema.path, m=missing))
+
+    # only whole key groups can be filtered out, so the per-group checks still hold
+    filters = filters or {}
+    not_dims = [col for col in filters if col not in schema.dims]
+    if not_dims:
+        raise SchemaError('{p}: can only filter on {d}, got {f}'.format(p=schema.path, d=schema.dims, f=not_dims))
+
+    last_dates = None
+    # everything as str so parse() sees the raw text
+    for raw_df in data_stream.read_chunks(schema.path, filters=filters, columns=list(schema.columns), dtype=str):
+        df, problems = parse(raw_df, schema)
+        chunk_problems, last_dates = check(df, schema, last_dates)
+        problems += chunk_problems
+        if problems:
+            raise SchemaError('{p}:\n  {e}'.format(p=schema.path, e='\n  '.join(problems)))
+        yield df
+
+def _schema(name):
+    if name not in SCHEMAS:
+        raise SchemaError('no schema registered for {n}'.format(n=name))
+    return SCHEMAS[name]
+
+# the schema and file stat are part of the cache key, and the code version covers this
+# module and data_stream, so editing SCHEMAS, the checks or the reader invalidates cached frames
+@memoize(depends=[data_stream])
+def _load(name, schema, mtime, size):
+    return pd.concat(list(_validated_chunks(schema)))
+
+@memoize(depends=[data_stream])
+def _load_tail(name, schema, months, filters, mtime, size):
+    tail_df = data_stream.tail_chunks(_validated_chunks(schema, filters), months)
+    if tail_df is None:
+        # nothing matched the filters: an empty frame with the schema's types
+        return parse(pd.DataFrame(columns=list(schema.columns), dtype=str), schema)[0]
+
+    return tail_df.reset_index(drop=True)
+
+def load(name):
+    """
+    Validated, typed dataframe for a registered file. Results are cached on the schema and
+    the file's modification time and size, so edits to either are picked up on the next call.
+
+    This holds the whole file; use stream() or load_tail() for the long-format files.
+    """
+    schema = _schema(name)
+    stat = os.stat(schema.path)
+    return _load(name, schema, stat.st_mtime_ns, stat.st_size)
+
+def stream(name, filters=None, start=None, end=None):
+    """
+    Yield validated, typed chunks of a registered file.
+
+    filters: dict of key column -> value (or list of values), applied while reading
+    start / end: inclusive 'YYYY-MM-DD' bounds on DATE, applied after the checks so
+    gaps at the edges of the range are still caught
+    """
+    for df in _validated_chunks(_schema(name), filters):
+        if start is not None:
+            df = df[df['DATE'] >= start]
+        if end is not None:
+            df = df[df['DATE'] <= end]
+        if not df.empty:
+            yield df
+
+def load_tail(name, months, filters=None):
+    """
+    Validated rows for the last n months of a registered file, e.g.
+        load_tail('HOMESALES', 60, filters={'REGION': 'United States'})
+    Only the current window is held while reading; cached like load().
+    """
+    schema = _schema(name)
+    stat = os.stat(schema.path)
+    return _load_tail(name, schema, months, filters, stat.st_mtime_ns, stat.st_size)